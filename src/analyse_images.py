@@ -15,8 +15,9 @@ import seaborn as sns
 from matplotlib import pyplot as plt
 from tqdm import tqdm
 
-from utils import io
 from utils import metadata as mt
+from utils.analyzer import Analyzer, extract_array
+from utils.report import write_html_report
 
 sns.set_theme(
     style="whitegrid",
@@ -30,19 +31,6 @@ sns.set_theme(
 CURR_DIR = dirname(realpath(__file__))
 
 
-def extract_array(
-    metadata_list: list[dict],
-    key: str,
-    default=0.0,
-    dtype=None,
-    remove_nan: bool = True,
-):
-    x = np.array([m.get(key, default) for m in metadata_list], dtype=dtype)
-    if remove_nan:
-        x = x[np.isfinite(x)]
-    return x
-
-
 def plot(
     data,
     title,
@@ -130,46 +118,30 @@ def main(
     processed_only: bool,
     save_memory: bool = False,
     read_jpg: bool = False,
+    keep_duplicates: bool = False,
+    html_report: bool = False,
 ):
-    if not read_jpg and (original_only or processed_only):
-        tqdm.write(
-            "`original_only` and `processed_only` cannot be True if `read_jpg` is False. Exiting ..."
+    try:
+        analyzer = Analyzer(
+            read_jpg=read_jpg,
+            original_only=original_only,
+            processed_only=processed_only,
+            keep_duplicates=keep_duplicates,
+            log_fn=tqdm.write,
+            progress=True,
         )
+    except ValueError as e:
+        tqdm.write(f"{e} Exiting ...")
         exit(1)
-
-    if original_only and processed_only:
-        tqdm.write("`original_only` and `processed_only` cannot both be True. Exiting ...")
-        exit(1)
-
-    # List image files
-    file_filter_fn = io.is_jpg if read_jpg else io.is_raw
-    img_files = []
-    for root, _, files in os.walk(dir_path, topdown=False):
-        for fname in sorted(files):
-            if not file_filter_fn(fname):
-                continue
-            fpath = os.path.join(root, fname)
-            img_files.append(fpath)
-
-    metadata_list = []
-    for fpath in tqdm(img_files, "Reading EXIF data"):
-        try:
-            metadata = mt.extract_metadata(fpath)
-        except Exception as e:
-            tqdm.write(f"File cannot be read: {fpath}\nError: {repr(e)}")
-            continue
-        if metadata.get("FocalLength", None) is None:
-            tqdm.write(f"Focal length data missing: {fpath}")
-            continue
-        if original_only and "adobe" in metadata["CreatorTool"].lower():
-            tqdm.write(f"This seems like a processed image: {fpath}")
-            continue
-        if processed_only and "adobe" not in metadata["CreatorTool"].lower():
-            tqdm.write(f"This seems like an unprocessed image: {fpath}")
-            continue
-        metadata_list.append(metadata)
+    analyzer.scan(dir_path)
+    metadata_list = analyzer.metadata_list
     mt.print_exif_data(metadata_list[0])
 
+    if html_report:
+        report_path = write_html_report(analyzer.aggregates(), join(CURR_DIR, "plots"))
+        tqdm.write(f"HTML report saved to: {report_path}")
+        return
+
     # Plot combined
     try:
         plot_all(metadata_list, "Photo Trend - All", save_memory)
@@ -221,6 +193,18 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="bool: If specified, only analyse processed images.",
     )
+    parser.add_argument(
+        "--keep_duplicates",
+        "-k",
+        action="store_true",
+        help="bool: If specified, do not skip duplicate image files.",
+    )
+    parser.add_argument(
+        "--html_report",
+        "-r",
+        action="store_true",
+        help="bool: If specified, write an HTML report instead of PNG charts.",
+    )
     return parser.parse_args()
 
 
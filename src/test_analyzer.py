@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import os
+import shutil
+from os.path import realpath
+from pathlib import Path
+
+from utils import analyzer as an
+from utils import io
+from utils import metadata as mt
+from utils.report import write_html_report
+
+CURR_DIR = Path(realpath(__file__)).parent
+
+
+def test_analyzer(tmp_path, monkeypatch):
+    src = CURR_DIR / "test_data" / "4088623168.jpg"
+    shutil.copyfile(src, tmp_path / src.name)
+
+    extracted = []
+    extract_metadata = mt.extract_metadata
+
+    def _extract_metadata(file_path):
+        extracted.append(file_path)
+        return extract_metadata(file_path)
+
+    monkeypatch.setattr(an.mt, "extract_metadata", _extract_metadata)
+    analyzer = an.Analyzer(read_jpg=True)
+    aggregates = analyzer.analyze(str(tmp_path))
+    assert list(aggregates.keys()) == ["All", "2006"]
+    assert aggregates["All"]["num_images"] == 1
+    hists = aggregates["All"]["histograms"]
+    assert sum(hists["FocalLength"]["counts"]) == 1
+    assert len(hists["FocalLength"]["edges"]) == len(hists["FocalLength"]["counts"]) + 1
+    assert len(hists["LensModel"]["labels"]) == len(hists["LensModel"]["counts"])
+    assert len(extracted) == 1
+
+    # Unchanged files are not extracted again, and duplicates are skipped
+    shutil.copyfile(src, tmp_path / "copy.jpg")
+    aggregates.pop("2006")
+    aggregates = analyzer.refresh()
+    assert list(aggregates.keys()) == ["All", "2006"]
+    assert aggregates["All"]["num_images"] == 1
+    assert len(extracted) == 1
+
+    # Modified files are extracted again
+    st = os.stat(tmp_path / src.name)
+    os.utime(tmp_path / src.name, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    analyzer.refresh()
+    assert len(extracted) == 2
+
+
+def test_analyzer_alternating_paths(tmp_path, monkeypatch):
+    src = CURR_DIR / "test_data" / "4088623168.jpg"
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        shutil.copyfile(src, tmp_path / name / src.name)
+
+    extracted = []
+    extract_metadata = mt.extract_metadata
+
+    def _extract_metadata(file_path):
+        extracted.append(file_path)
+        return extract_metadata(file_path)
+
+    monkeypatch.setattr(an.mt, "extract_metadata", _extract_metadata)
+    analyzer = an.Analyzer(read_jpg=True)
+    for name in ("a", "b", "a", "b"):
+        assert analyzer.analyze(str(tmp_path / name))["All"]["num_images"] == 1
+    assert len(extracted) == 2
+
+    # Deleted files are dropped from the cache
+    os.remove(tmp_path / "a" / src.name)
+    analyzer.analyze(str(tmp_path / "b"))
+    assert len(analyzer._cache) == 1
+
+
+def test_analyzer_overlapping_paths():
+    test_data = CURR_DIR / "test_data"
+    paths = [str(test_data), str(test_data), str(test_data / "4088623168.jpg")]
+    for keep_duplicates in (False, True):
+        analyzer = an.Analyzer(read_jpg=True, keep_duplicates=keep_duplicates)
+        assert analyzer.analyze(paths)["All"]["num_images"] == 1
+
+
+def test_analyzer_unreadable(tmp_path):
+    src = CURR_DIR / "test_data" / "4088623168.jpg"
+    shutil.copyfile(src, tmp_path / src.name)
+    (tmp_path / "broken.jpg").symlink_to(tmp_path / "missing.jpg")
+    for keep_duplicates in (False, True):
+        analyzer = an.Analyzer(read_jpg=True, keep_duplicates=keep_duplicates)
+        assert analyzer.analyze(str(tmp_path))["All"]["num_images"] == 1
+
+
+def test_compute_histograms_zero_iso():
+    metadata = {"FocalLength": 35.0, "FNumber": 2.0, "ISOSpeedRatings": 0.0, "LensModel": "NA"}
+    hists = an.compute_histograms([metadata, dict(metadata, ISOSpeedRatings=100.0)])
+    assert sum(hists["ISOSpeedRatings"]["counts"]) == 1
+
+
+def test_html_report(tmp_path):
+    aggregates = an.Analyzer(read_jpg=True).analyze(str(CURR_DIR / "test_data"))
+    report_path = write_html_report(aggregates, str(tmp_path / "report"))
+    assert Path(report_path).name == "report.html"
+    assert 'const DATA_URL = "aggregates.json";' in Path(report_path).read_text(encoding="utf8")
+
+    # Check the keys read by the report template
+    data = io.read_json(tmp_path / "report" / "aggregates.json")
+    assert data == aggregates
+    assert list(data.keys()) == ["All", "2006"]
+    for group in data.values():
+        assert group["num_images"] == 1
+        hists = group["histograms"]
+        for key in ("FocalLength", "FNumber", "ISOSpeedRatings", "ShutterSpeedValue"):
+            assert len(hists[key]["edges"]) == len(hists[key]["counts"]) + 1
+            assert sum(hists[key]["counts"]) == 1
+        for key in ("ISOSpeedRatings", "ShutterSpeedValue"):
+            assert len(hists[key]["xticks"]) == len(hists[key]["xticklabels"]) > 0
+        assert len(hists["LensModel"]["labels"]) == len(hists["LensModel"]["counts"])
+
+
+if __name__ == "__main__":
+    import pytest
+
+    pytest.main([__file__])
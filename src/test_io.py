@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import shutil
+from os.path import realpath
+from pathlib import Path
+
+from utils import io
+
+CURR_DIR = Path(realpath(__file__)).parent
+
+
+def test_duplicate_file_index(tmp_path):
+    src = CURR_DIR / "test_data" / "4088623168.jpg"
+    original = tmp_path / "a" / src.name
+    copy = tmp_path / "b" / src.name
+    original.parent.mkdir()
+    copy.parent.mkdir()
+    shutil.copyfile(src, original)
+    shutil.copyfile(src, copy)
+
+    # Same size, different tail
+    data = bytearray(src.read_bytes())
+    data[-1] ^= 0xFF
+    modified = tmp_path / "modified.jpg"
+    modified.write_bytes(bytes(data))
+
+    # Same size, head and tail, but different content in the middle
+    data = bytearray(src.read_bytes())
+    data[len(data) // 2] ^= 0xFF
+    middle = tmp_path / "middle.jpg"
+    middle.write_bytes(bytes(data))
+    assert io.hash_file_sample_blake2b(str(middle), 4096) == io.hash_file_sample_blake2b(
+        str(original), 4096
+    )
+
+    index = io.DuplicateFileIndex(sample_size=4096)
+    assert index.add(str(original)) is None
+    assert index.add(str(modified)) is None
+    assert index.add(str(middle)) is None
+    assert index.add(str(copy)) == str(original)
+    # Repeated paths are reported as already seen, not as new files
+    assert index.add(str(original)) == str(original)
+    assert index.add(str(copy)) == str(copy)
+    assert index.duplicates == {str(copy): str(original)}
+    assert index.num_duplicate_bytes == src.stat().st_size
+
+
+def test_duplicate_file_index_unreadable(tmp_path):
+    src = CURR_DIR / "test_data" / "4088623168.jpg"
+    shutil.copyfile(src, tmp_path / src.name)
+    broken = tmp_path / "broken.jpg"
+    broken.symlink_to(tmp_path / "missing.jpg")
+
+    index = io.DuplicateFileIndex()
+    assert index.add(str(broken)) is None
+    assert index.add(str(tmp_path / src.name)) is None
+    assert index.duplicates == {}
+
+
+def test_hash_file_sample_blake2b(tmp_path):
+    small = tmp_path / "small.bin"
+    small.write_bytes(b"0123456789")
+    assert io.hash_file_sample_blake2b(str(small), sample_size=4) == io.hash_bytes_blake2b(
+        b"10", b"0123", b"6789"
+    )
+    assert io.hash_file_sample_blake2b(str(small), sample_size=8) == io.hash_bytes_blake2b(
+        b"10", b"01234567", b"89"
+    )
+    assert io.hash_string_blake2b("abc") == io.hash_bytes_blake2b(b"abc")
+
+
+if __name__ == "__main__":
+    import pytest
+
+    pytest.main([__file__])
@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import copy
+import logging
+import math
+import os
+from typing import Any, Callable, Iterable
+
+import numpy as np
+from tqdm import tqdm
+
+from utils import io
+from utils import metadata as mt
+
+logger = logging.getLogger(__name__)
+
+
+def extract_array(
+    metadata_list: list[dict],
+    key: str,
+    default=0.0,
+    dtype=None,
+    remove_nan: bool = True,
+):
+    x = np.array([m.get(key, default) for m in metadata_list], dtype=dtype)
+    if remove_nan:
+        x = x[np.isfinite(x)]
+    return x
+
+
+def histogram(x: np.ndarray, bins="auto", xticks=None, xticklabels=None) -> dict:
+    """Bins numerical data using the same default binning as `sns.histplot()`.
+
+    Returns:
+        hist (dict): A JSON-serialisable dict with `edges` and `counts`,
+            and optionally `xticks` and `xticklabels`.
+    """
+    counts, edges = np.histogram(x, bins=bins)
+    hist = {"edges": edges.tolist(), "counts": counts.tolist()}
+    if xticks is not None and xticklabels is not None:
+        hist["xticks"] = list(xticks)
+        hist["xticklabels"] = list(xticklabels)
+    return hist
+
+
+def categorical_histogram(x: np.ndarray) -> dict:
+    """Counts categorical data.
+
+    Returns:
+        hist (dict): A JSON-serialisable dict with `labels` and `counts`.
+    """
+    labels, counts = np.unique(x, return_counts=True)
+    return {"labels": labels.tolist(), "counts": counts.tolist()}
+
+
+def compute_histograms(metadata_list: list[dict]) -> dict:
+    """Computes the histograms plotted by `plot_all()`.
+
+    Args:
+        metadata_list (list[dict]): A list of metadata dicts from `mt.extract_metadata()`.
+
+    Returns:
+        histograms (dict): A JSON-serialisable dict of histograms, keyed by EXIF tag.
+    """
+    f_lens = extract_array(metadata_list, "FocalLength", dtype=np.float64)
+    f_nums = extract_array(metadata_list, "FNumber", dtype=np.float64)
+    lens_models = extract_array(metadata_list, "LensModel", "NA", remove_nan=False)
+    iso_nums = extract_array(metadata_list, "ISOSpeedRatings", dtype=np.float64)
+    shutter_speed = extract_array(metadata_list, "ShutterSpeedValue", 16.0, dtype=np.float64)
+
+    # ISO of 0 has no log value
+    iso_log = np.log2(iso_nums[iso_nums > 0])
+    if len(iso_log) > 0:
+        iso_xticks = list(range(math.floor(iso_log.min()) - 1, math.ceil(iso_log.max()) + 1))
+        iso_xticklabels = [f"{round(2.0 ** x):,d}" for x in iso_xticks]
+    else:
+        iso_xticks = iso_xticklabels = None
+    if len(shutter_speed) > 0:
+        ss_max = math.ceil(shutter_speed.max()) + 1
+        ss_min = math.floor(shutter_speed.min()) - 1
+        ss_xticks = list(range(ss_min, ss_max))
+        ss_xticklabels = [mt.convert_shutter_value(x, True) for x in ss_xticks]
+    else:
+        ss_xticks = ss_xticklabels = None
+
+    return {
+        "FocalLength": histogram(f_lens),
+        "FNumber": histogram(f_nums),
+        "ISOSpeedRatings": histogram(iso_log, xticks=iso_xticks, xticklabels=iso_xticklabels),
+        "ShutterSpeedValue": histogram(
+            shutter_speed, xticks=ss_xticks, xticklabels=ss_xticklabels
+        ),
+        "LensModel": categorical_histogram(lens_models),
+    }
+
+
+class Analyzer:
+    """
+    Extracts photo metadata and computes histogram aggregates, keeping its state warm across calls.
+
+    Metadata is cached per file and keyed by file size and modification time,
+    so repeated calls to `analyze()` and `refresh()` only extract new or modified files.
+    Aggregates are computed lazily and cached until the set of analysed files changes.
+
+    Args:
+        read_jpg (bool, optional): If True, analyse JPEG images instead of RAW images.
+            Defaults to False.
+        original_only (bool, optional): If True, only analyse original unprocessed images.
+            Defaults to False.
+        processed_only (bool, optional): If True, only analyse processed images.
+            Defaults to False.
+        keep_duplicates (bool, optional): If True, do not skip duplicate image files.
+            Defaults to False.
+        log_fn (Callable, optional): A callable for logging. Defaults to `logger.debug`.
+        progress (bool, optional): If True, display a progress bar during extraction.
+            Defaults to False.
+
+    Raises:
+        ValueError: If the combination of `read_jpg`, `original_only` and `processed_only`
+            is invalid.
+    """
+
+    def __init__(
+        self,
+        read_jpg: bool = False,
+        original_only: bool = False,
+        processed_only: bool = False,
+        keep_duplicates: bool = False,
+        log_fn: Callable = logger.debug,
+        progress: bool = False,
+    ):
+        if not read_jpg and (original_only or processed_only):
+            raise ValueError(
+                "`original_only` and `processed_only` cannot be True if `read_jpg` is False."
+            )
+        if original_only and processed_only:
+            raise ValueError("`original_only` and `processed_only` cannot both be True.")
+        self.read_jpg = read_jpg
+        self.original_only = original_only
+        self.processed_only = processed_only
+        self.keep_duplicates = keep_duplicates
+        self.log_fn = log_fn
+        self.progress = progress
+        self.paths = []
+        # file path -> ((file size, mtime_ns), metadata or None if the file is skipped)
+        self._cache = {}
+        # file path -> (file size, mtime_ns, fingerprint), see `io.DuplicateFileIndex`
+        self._fingerprint_cache = {}
+        self._img_files = []
+        self._aggregates = None
+
+    @property
+    def metadata_list(self) -> list[dict]:
+        """Metadata of the analysed images, in directory walk order."""
+        metadata_list = (self._cache[fpath][1] for fpath in self._img_files)
+        return [m for m in metadata_list if m is not None]
+
+    def analyze(self, paths: str | Iterable[str]) -> dict[str, Any]:
+        """Analyses the images in `paths`, reusing cached metadata where possible.
+
+        Args:
+            paths (str | Iterable[str]): Directories and / or image files to analyse.
+
+        Returns:
+            aggregates (dict[str, Any]): See `aggregates()`.
+        """
+        self.scan(paths)
+        return self.aggregates()
+
+    def refresh(self) -> dict[str, Any]:
+        """Re-scans the current paths, extracting only new or modified files.
+
+        Returns:
+            aggregates (dict[str, Any]): See `aggregates()`.
+        """
+        self.scan()
+        return self.aggregates()
+
+    def scan(self, paths: str | Iterable[str] | None = None) -> None:
+        """Updates the metadata of the images in `paths` without computing aggregates.
+
+        Only new or modified files are extracted. Cache entries of files outside `paths`
+        are kept for later calls, and are only dropped once the files are deleted.
+
+        Args:
+            paths (str | Iterable[str] | None, optional): Directories and / or image files
+                to analyse. Defaults to None (re-scan the current paths).
+        """
+        if paths is not None:
+            self.paths = [paths] if isinstance(paths, str) else list(paths)
+        img_files = []
+        stale = []
+        for fpath in self._list_files():
+            try:
+                st = os.stat(fpath)
+            except OSError as e:
+                self.log_fn(f"File cannot be read: {fpath}\nError: {repr(e)}")
+                continue
+            img_files.append(fpath)
+            stat_key = (st.st_size, st.st_mtime_ns)
+            if self._cache.get(fpath, (None,))[0] != stat_key:
+                stale.append((fpath, stat_key))
+        if len(stale) > 0:
+            for fpath, stat_key in tqdm(stale, "Reading EXIF data", disable=not self.progress):
+                self._cache[fpath] = (stat_key, self._extract(fpath))
+        # Keep entries of files outside the current paths warm, unless they have been deleted
+        listed = set(img_files)
+        for fpath in [f for f in self._cache if f not in listed and not os.path.exists(f)]:
+            del self._cache[fpath]
+        if len(stale) > 0 or img_files != self._img_files:
+            self._aggregates = None
+        self._img_files = img_files
+
+    def aggregates(self) -> dict[str, Any]:
+        """Returns the histogram aggregates of the analysed images.
+
+        Aggregates are computed on the first call after a scan that changed the analysed files.
+        Groups whose histograms cannot be computed are logged and left out.
+
+        Returns:
+            aggregates (dict[str, Any]): A JSON-serialisable dict keyed by "All" and by year.
+                Each value is a dict with `num_images` and `histograms`
+                (see `compute_histograms()`). The dict is a copy and can be modified freely.
+        """
+        if self._aggregates is None:
+            metadata_list = self.metadata_list
+            groups = {"All": metadata_list}
+            years = set([m["DateTimeOriginal"].year for m in metadata_list])
+            for year in sorted(years):
+                groups[f"{year:04d}"] = [
+                    m for m in metadata_list if m["DateTimeOriginal"].year == year
+                ]
+            self._aggregates = {}
+            for name, group in groups.items():
+                try:
+                    histograms = compute_histograms(group)
+                except Exception as e:
+                    self.log_fn(f"Failed to compute histograms: {name}\nError: {repr(e)}")
+                    continue
+                self._aggregates[name] = {"num_images": len(group), "histograms": histograms}
+        return copy.deepcopy(self._aggregates)
+
+    def _list_files(self) -> list[str]:
+        file_filter_fn = io.is_jpg if self.read_jpg else io.is_raw
+        dup_index = io.DuplicateFileIndex(
+            fingerprint_cache=self._fingerprint_cache, log_fn=self.log_fn
+        )
+        listed = set()
+        img_files = []
+        for path in self.paths:
+            if os.path.isfile(path):
+                walk = [(os.path.dirname(path), None, [os.path.basename(path)])]
+            else:
+                walk = os.walk(path, topdown=False)
+            for root, _, files in walk:
+                for fname in sorted(files):
+                    if not file_filter_fn(fname):
+                        continue
+                    # Repeated or overlapping paths can reach the same file more than once
+                    fpath = os.path.realpath(os.path.join(root, fname))
+                    if fpath in listed:
+                        continue
+                    listed.add(fpath)
+                    if not self.keep_duplicates and dup_index.add(fpath) is not None:
+                        continue
+                    img_files.append(fpath)
+        for fpath in [f for f in self._fingerprint_cache if f not in listed]:
+            if not os.path.exists(fpath):
+                del self._fingerprint_cache[fpath]
+        if len(dup_index.duplicates) > 0:
+            self.log_fn(
+                f"Skipped {len(dup_index.duplicates):,d} duplicate files "
+                f"({dup_index.num_duplicate_bytes / 2**20:,.1f} MiB)"
+            )
+            for fpath, original in dup_index.duplicates.items():
+                self.log_fn(f"Duplicate: {fpath}\n   Original: {original}")
+        return img_files
+
+    def _extract(self, fpath: str) -> dict | None:
+        try:
+            metadata = mt.extract_metadata(fpath)
+        except Exception as e:
+            self.log_fn(f"File cannot be read: {fpath}\nError: {repr(e)}")
+            return None
+        if metadata.get("FocalLength", None) is None:
+            self.log_fn(f"Focal length data missing: {fpath}")
+            return None
+        if self.original_only and "adobe" in metadata["CreatorTool"].lower():
+            self.log_fn(f"This seems like a processed image: {fpath}")
+            return None
+        if self.processed_only and "adobe" not in metadata["CreatorTool"].lower():
+            self.log_fn(f"This seems like an unprocessed image: {fpath}")
+            return None
+        return metadata
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import filecmp
 import hashlib
 import json
 import logging
@@ -209,11 +210,142 @@ def find_tf1_checkpoint_files(path: str, prefix: str = "model_") -> list[str]:
 
 
 def hash_string_blake2b(string: str, digest_size: int = 8) -> str:
+    return hash_bytes_blake2b(string.encode(), digest_size=digest_size)
+
+
+def hash_bytes_blake2b(*chunks: bytes, digest_size: int = 8) -> str:
     hasher = hashlib.blake2b(digest_size=digest_size)
-    hasher.update(string.encode())
+    for chunk in chunks:
+        hasher.update(chunk)
     return hasher.hexdigest()
 
 
+def hash_file_sample_blake2b(
+    file_path: str, sample_size: int = 65536, digest_size: int = 8
+) -> str:
+    """Hashes the file size together with the first and last `sample_size` bytes of a file.
+
+    Only up to `2 * sample_size` bytes are read, regardless of the file size.
+
+    Args:
+        file_path (str): The file path.
+        sample_size (int, optional): Number of bytes to read from the head and the tail.
+            Defaults to 65536.
+        digest_size (int, optional): Digest size in bytes. Defaults to 8.
+
+    Returns:
+        digest (str): The hex digest.
+    """
+    file_size = os.path.getsize(file_path)
+    with open(file_path, "rb") as f:
+        head = f.read(sample_size)
+        if file_size > 2 * sample_size:
+            f.seek(-sample_size, os.SEEK_END)
+            tail = f.read(sample_size)
+        else:
+            # The head already covers the start of the tail, read the remainder
+            tail = f.read()
+    return hash_bytes_blake2b(str(file_size).encode(), head, tail, digest_size=digest_size)
+
+
+class DuplicateFileIndex:
+    """
+    Detects duplicate files using their size and a partial-content fingerprint.
+
+    Files are first grouped by size, which is read from the file system and costs no I/O.
+    A file is only fingerprinted (see `hash_file_sample_blake2b()`) once another file of
+    the same size has been seen, so files with unique sizes are never read.
+    Files with matching fingerprints are only candidates, and are confirmed as duplicates
+    by a full content comparison.
+
+    Args:
+        sample_size (int, optional): See `hash_file_sample_blake2b()`. Defaults to 65536.
+        fingerprint_cache (dict | None, optional): If provided, fingerprints are memoised in
+            this dict as `file_path -> (file_size, mtime_ns, fingerprint)`, so that it can be
+            shared across indices to avoid re-reading unchanged files. Defaults to None.
+        log_fn (Callable, optional): A callable for logging. Defaults to `logger.debug`.
+    """
+
+    def __init__(
+        self,
+        sample_size: int = 65536,
+        fingerprint_cache: dict | None = None,
+        log_fn: Callable = logger.debug,
+    ):
+        self.sample_size = sample_size
+        self.fingerprint_cache = fingerprint_cache
+        self.log_fn = log_fn
+        # file size -> path of the only file of this size, or None once it is fingerprinted
+        self._sizes = {}
+        # (file size, fingerprint) -> paths of files with distinct content
+        self._fingerprints = {}
+        self._paths = set()
+        self.duplicates = {}
+        self.num_duplicate_bytes = 0
+
+    def _fingerprint(self, file_path: str, file_size: int) -> tuple[int, str]:
+        if self.fingerprint_cache is None:
+            return file_size, hash_file_sample_blake2b(file_path, self.sample_size)
+        mtime_ns = os.stat(file_path).st_mtime_ns
+        cached = self.fingerprint_cache.get(file_path, None)
+        if cached is None or cached[:2] != (file_size, mtime_ns):
+            cached = (file_size, mtime_ns, hash_file_sample_blake2b(file_path, self.sample_size))
+            self.fingerprint_cache[file_path] = cached
+        return file_size, cached[2]
+
+    def add(self, file_path: str) -> str | None:
+        """Adds a file to the index.
+
+        Args:
+            file_path (str): The file path.
+
+        Returns:
+            original (str | None): Path of the previously added file that `file_path`
+                duplicates, or None if `file_path` is not a duplicate.
+                If `file_path` itself has already been added, `file_path` is returned.
+                Files that cannot be read are logged and treated as not duplicates.
+        """
+        if file_path in self._paths:
+            return file_path
+        self._paths.add(file_path)
+        try:
+            file_size = os.path.getsize(file_path)
+        except OSError as e:
+            self.log_fn(f"File size cannot be read: {file_path}\nError: {repr(e)}")
+            return None
+        if file_size not in self._sizes:
+            # First file of this size, defer hashing
+            self._sizes[file_size] = file_path
+            return None
+        unhashed = self._sizes[file_size]
+        self._sizes[file_size] = None
+        if unhashed is not None:
+            try:
+                self._fingerprints[self._fingerprint(unhashed, file_size)] = [unhashed]
+            except OSError as e:
+                self.log_fn(f"File cannot be fingerprinted: {unhashed}\nError: {repr(e)}")
+        try:
+            key = self._fingerprint(file_path, file_size)
+        except OSError as e:
+            self.log_fn(f"File cannot be fingerprinted: {file_path}\nError: {repr(e)}")
+            return None
+        candidates = self._fingerprints.setdefault(key, [])
+        for original in candidates:
+            try:
+                if filecmp.cmp(original, file_path, shallow=False):
+                    break
+            except OSError as e:
+                self.log_fn(f"Files cannot be compared: {original}, {file_path}\nError: {repr(e)}")
+        else:
+            if len(candidates) > 0:
+                self.log_fn(f"Same size and fingerprint but different content: {file_path}")
+            candidates.append(file_path)
+            return None
+        self.duplicates[file_path] = original
+        self.num_duplicate_bytes += file_size
+        return original
+
+
 def find_files(directory: str, file_ext: Iterable[str], max_level: int = 0) -> list[str]:
     """
     Recursively lists all the files with matching extension(s) in a directory.
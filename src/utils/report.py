@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import os
+import shutil
+from os.path import dirname, join, realpath
+
+from utils import io
+
+TEMPLATE_PATH = join(dirname(realpath(__file__)), "report_template.html")
+
+
+def write_html_report(aggregates: dict, output_dir: str) -> str:
+    """Writes a static HTML report that draws the histograms client-side.
+
+    The report consists of `report.html` and `aggregates.json`, the latter holding
+    the pre-binned histogram counts from `Analyzer.aggregates()`.
+    The page fetches `aggregates.json`, so it needs to be served over HTTP
+    (for example with `python -m http.server`) instead of opened from disk.
+
+    Args:
+        aggregates (dict): Histogram aggregates from `Analyzer.aggregates()`.
+        output_dir (str): Output directory.
+
+    Returns:
+        report_path (str): Path to `report.html`.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    io.dump_json(aggregates, join(output_dir, "aggregates.json"), separators=(",", ":"))
+    return shutil.copyfile(TEMPLATE_PATH, join(output_dir, "report.html"))